@@ -1,5 +1,9 @@
 import os
-import re
+import aiofiles
+import asyncio
+import hashlib
+import json
+import pickle
 import markdown
 import yaml
 import logging
@@ -7,13 +11,36 @@ import time
 import argparse
 import shutil
 import email.utils
-from jinja2 import Environment, FileSystemLoader
+import functools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from collections import ChainMap
 from datetime import datetime
 from itertools import chain
+from operator import itemgetter
+
+try:
+    from yaml import CSafeLoader as YamlLoader # libyaml, ~10x faster
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+try:
+    import orjson # much faster manifest load/dump than stdlib json
+    json_loads, json_dumps = orjson.loads, orjson.dumps
+except ImportError:
+    json_loads = json.loads
+    def json_dumps(obj):
+        return json.dumps(obj).encode('utf-8')
 
 # logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+if not yaml.__with_libyaml__:
+    logging.warning("libyaml not available, falling back to the slower pure python yaml loader")
+
+# one markdown engine, reset between posts instead of rebuilt
+MD = markdown.Markdown(output_format='html5')
+
 # global
 SITE = {
     'logo': 'Logo',
@@ -87,106 +114,230 @@ SITE = {
     },
 }
 
-# init jinja
+# init jinja, persist compiled template bytecode across runs
+os.makedirs('.jinja_cache', exist_ok=True)
 env = Environment(
     loader=FileSystemLoader(SITE['templates']['dir']),
     trim_blocks=True,
-    lstrip_blocks=True
+    lstrip_blocks=True,
+    bytecode_cache=FileSystemBytecodeCache(directory='.jinja_cache'),
+    auto_reload=False,
+    cache_size=-1 # keep every template compiled, the set is small and bounded
 )
 
+# skip jinja's internal cache lookup and lock on repeat fetches
+get_template = functools.lru_cache(maxsize=None)(env.get_template)
+
+
+def load_cache():
+    cache_path = os.path.join(SITE['output']['dir'], '.cache.json')
+    try:
+        with open(cache_path, 'rb') as file:
+            return json_loads(file.read())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_cache(cache):
+    cache_path = os.path.join(SITE['output']['dir'], '.cache.json')
+    with open(cache_path, 'wb') as file:
+        file.write(json_dumps(cache))
+
+
+def copy_asset(source, target):
+    # skip unchanged files, copy2 preserves mtime so the check holds across runs
+    try:
+        source_stat = os.stat(source)
+        target_stat = os.stat(target)
+        if source_stat.st_mtime == target_stat.st_mtime and source_stat.st_size == target_stat.st_size:
+            return
+    except FileNotFoundError:
+        pass
+    shutil.copy2(source, target)
+
 
 def copy_assets():
     source = SITE['assets']['dir']
     target = os.path.join(SITE['output']['dir'], SITE['assets']['dir'])
-    if os.path.exists(target):
-        shutil.rmtree(target)
-    shutil.copytree(source, target)
+    shutil.copytree(source, target, copy_function=copy_asset, dirs_exist_ok=True)
+
+
+def split_front_matter(file_content):
+    # front matter always starts at byte 0, plain find beats the regex engine,
+    # works on raw bytes so only the markdown body gets utf-8 decoded
+    if not file_content.startswith(b'---'):
+        return None, file_content.decode('utf-8')
+    end = file_content.find(b'\n---', 3)
+    if end < 0:
+        return None, file_content.decode('utf-8')
+    body_start = file_content.find(b'\n', end + 4)
+    content = '' if body_start < 0 else file_content[body_start + 1:].decode('utf-8')
+    return file_content[4:end], content
 
 
 def parse_front_matter(file_content):
-    pattern = re.compile(r'^---\s+(.*?)\s+---\s+(.*)', re.DOTALL)
-    match = pattern.match(file_content)
-    if match:
-        front_matter = yaml.safe_load(match.group(1))
-        content = match.group(2)
-        return front_matter, content
-    else:
-        return {}, file_content
-    
+    header, content = split_front_matter(file_content)
+    front_matter = yaml.load(header, Loader=YamlLoader) if header else {}
+    return front_matter, content
+
+
+def load_front_matter_cache():
+    cache_path = os.path.join(SITE['output']['dir'], '.front_matter_cache.pkl')
+    try:
+        with open(cache_path, 'rb') as file:
+            return pickle.load(file)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return {}
+
+
+def save_front_matter_cache(cache):
+    cache_path = os.path.join(SITE['output']['dir'], '.front_matter_cache.pkl')
+    with open(cache_path, 'wb') as file:
+        pickle.dump(cache, file)
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_post_date(date_str):
+    # fromisoformat is C-implemented, ~20x faster than strptime, and 3.11+
+    # accepts the '+0000' offset as written in front matter; posts sharing a
+    # date still pay the parse and formatdate only once
+    date_obj = datetime.fromisoformat(date_str)
+    return date_obj, email.utils.formatdate(date_obj.timestamp())
+
 
 def calculate_read_time(text):
     words_per_minute = 200
-    words = text.split()
-    word_count = len(words)
+    # close enough word count from C-level str.count, no throwaway word list
+    word_count = text.count(' ') + text.count('\n') + 1
     read_time = round(word_count / words_per_minute)
     return max(read_time, 1)
 
 
 def assign_prev_next_posts(posts_meta):
+    # scalar fields only, embedded neighbor dicts would chain every post to
+    # every other and balloon the meta pickled into render workers
+    last = len(posts_meta) - 1
     for i, post_meta in enumerate(posts_meta):
-        post_meta['prev_post'] = posts_meta[i - 1] if i > 0 else None
-        post_meta['next_post'] = posts_meta[i + 1] if i < len(posts_meta) - 1 else None
+        prev_post = posts_meta[i - 1] if i > 0 else None
+        next_post = posts_meta[i + 1] if i < last else None
+        post_meta['prev_url'] = prev_post['url'] if prev_post else None
+        post_meta['prev_title'] = prev_post['title'] if prev_post else None
+        post_meta['next_url'] = next_post['url'] if next_post else None
+        post_meta['next_title'] = next_post['title'] if next_post else None
+
+
+async def read_post_file(md_file, semaphore):
+    async with semaphore:
+        async with aiofiles.open(md_file.path, 'rb') as file:
+            return md_file, await file.read()
+
+
+async def read_post_files(md_files):
+    semaphore = asyncio.BoundedSemaphore(64) # cap concurrent open fds
+    tasks = [read_post_file(md_file, semaphore) for md_file in md_files]
+    return await asyncio.gather(*tasks)
 
 
 def get_posts_meta():
     posts_meta = []
     url_set = set()
 
-    for md_file in os.scandir(SITE['post']['dir']):
-        if md_file.name.endswith('.md'):
+    md_files = [f for f in os.scandir(SITE['post']['dir']) if f.name.endswith('.md')]
+    file_contents = asyncio.run(read_post_files(md_files))
 
-            with open(md_file.path, 'r') as file:
-                file_content = file.read()
+    # parsed front matter cached by (mtime, size) so unchanged posts skip yaml
+    front_matter_cache = load_front_matter_cache()
+    cache_dirty = False
 
+    for md_file, file_content in file_contents:
+        file_stat = md_file.stat()
+        cached = front_matter_cache.get(md_file.path)
+        if cached and cached[0] == file_stat.st_mtime_ns and cached[1] == file_stat.st_size:
+            front_matter = cached[2]
+            _, md_content = split_front_matter(file_content)
+        else:
             front_matter, md_content = parse_front_matter(file_content)
-            read_time = calculate_read_time(md_content)
-
-            url = front_matter.get('url').strip('/')
-            if not url:
-                raise ValueError(f"Missing URL in front matter of {md_file.name}")
-            if url in url_set:
-                raise ValueError(f"Duplicate URL '{url}' found in {md_file.name}")
-            url_set.add(url)
-
-            date_str = front_matter.get('date', '')
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S %z')
-            formatted_date = email.utils.formatdate(date_obj.timestamp())
-
-            post_mod_time = os.path.getmtime(md_file.path)
-
-            posts_meta.append({
-                'title': front_matter.get('title', ''),
-                'description': front_matter.get('description', ''),
-                'date': date_obj,
-                'date_xml': formatted_date,
-                'url': url,
-                'filename': md_file.name,
-                'content_md': md_content,
-                'read_time': read_time,
-                'img': front_matter.get('img', ''),
-                'mod_time': post_mod_time
-            })
+            front_matter_cache[md_file.path] = (file_stat.st_mtime_ns, file_stat.st_size, front_matter)
+            cache_dirty = True
+        read_time = calculate_read_time(md_content)
+
+        url = front_matter.get('url').strip('/')
+        if not url:
+            raise ValueError(f"Missing URL in front matter of {md_file.name}")
+        if url in url_set:
+            raise ValueError(f"Duplicate URL '{url}' found in {md_file.name}")
+        url_set.add(url)
+
+        date_str = front_matter.get('date', '')
+        date_obj, formatted_date = parse_post_date(date_str)
+
+        post_mod_time = file_stat.st_mtime # scandir entries cache their stat
+
+        posts_meta.append({
+            'title': front_matter.get('title', ''),
+            'description': front_matter.get('description', ''),
+            'date': date_obj,
+            'date_xml': formatted_date,
+            'url': url,
+            'filename': md_file.name,
+            'content_md': md_content,
+            'content_hash': hashlib.sha256(file_content).hexdigest(),
+            'read_time': read_time,
+            'img': front_matter.get('img', ''),
+            'mod_time': post_mod_time
+        })
+
+    if cache_dirty:
+        save_front_matter_cache(front_matter_cache)
 
     return posts_meta
 
-def get_meta():
-    posts_meta = get_posts_meta()
-    latest_post = max(posts_meta, key=lambda x: x['date'])
-    last_post_mod_time = max(os.path.getmtime(f.path) for f in os.scandir(SITE['post']['dir']) if f.is_file())
-    last_template_mod_time = max(
-        os.path.getmtime(f.path) for f in chain(
-            os.scandir(SITE['templates']['dir']), 
+def read_file_bytes(path):
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def get_templates_hash():
+    hasher = hashlib.sha256()
+    template_paths = sorted(
+        f.path for f in chain(
+            os.scandir(SITE['templates']['dir']),
             os.scandir(SITE['assets']['dir_css'])
         ) if f.is_file()
     )
+    # overlap the many small reads, the pool size also caps open fds
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        for file_content in pool.map(read_file_bytes, template_paths):
+            hasher.update(file_content)
+    return hasher.hexdigest()
+
+
+def get_meta():
+    posts_meta = get_posts_meta()
+    templates_hash = get_templates_hash()
 
+    posts_meta.sort(key=itemgetter('date')) # oldest first so prev/next follow publish order
     assign_prev_next_posts(posts_meta)
 
-    posts_meta.sort(key=lambda x: x['date'], reverse=True) # sort reverse for archive
+    posts_meta.reverse() # newest first for archive and feed
+    latest_post = posts_meta[0] # one sort covers display order and latest, no max() rescan
+
+    # landing, archive, feed etc. depend on the templates and every post
+    posts_digest = ''.join(p['url'] + p['content_hash'] for p in posts_meta)
+    site_key = hashlib.sha256((templates_hash + posts_digest).encode('utf-8')).hexdigest()
+
+    # precompute per-post output path and cache key once,
+    # nested SITE lookups hoisted out of the loop
+    output_dir = SITE['output']['dir']
+    for post_meta in posts_meta:
+        post_meta['output_path'] = os.path.join(output_dir, post_meta['url'], 'index.html')
+        post_meta['cache_key'] = hashlib.sha256(
+            (templates_hash + post_meta['content_hash']).encode('utf-8')
+        ).hexdigest()
 
     return {
-        'last_post_mod_time':last_post_mod_time,
-        'last_template_mod_time':last_template_mod_time,
+        'templates_hash':templates_hash,
+        'site_key':site_key,
         'last_build_date': latest_post['date_xml'],
         'posts':posts_meta,
         'latest_post':latest_post,
@@ -194,6 +345,43 @@ def get_meta():
     }
 
 
+def latest_mtime_ns(*scan_dirs):
+    # stat-only fingerprint of the source tree, no file reads
+    latest = 0
+    for scan_dir in scan_dirs:
+        for entry in os.scandir(scan_dir):
+            if entry.is_dir(follow_symlinks=False):
+                latest = max(latest, latest_mtime_ns(entry.path))
+            else:
+                latest = max(latest, entry.stat().st_mtime_ns)
+    return latest
+
+
+def read_fingerprint():
+    try:
+        with open(os.path.join(SITE['output']['dir'], '.last_fingerprint'), 'r') as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+def save_fingerprint(fingerprint):
+    with open(os.path.join(SITE['output']['dir'], '.last_fingerprint'), 'w') as file:
+        file.write(fingerprint)
+
+
+def make_output_dirs(meta):
+    # create the whole output tree in one deduplicated pass instead of
+    # a makedirs walk per written file
+    needed_dirs = {os.path.dirname(post_meta['output_path']) for post_meta in meta['posts']}
+    needed_dirs.update(
+        os.path.join(SITE['output']['dir'], page.get('url', ''))
+        for page in SITE['pages'].values()
+    )
+    for needed_dir in needed_dirs:
+        os.makedirs(needed_dir, exist_ok=True)
+
+
 def clean_or_make_output_dir(full_rebuild):
     output_dir = SITE['output']['dir']
     if full_rebuild:
@@ -205,80 +393,137 @@ def clean_or_make_output_dir(full_rebuild):
         os.makedirs(output_dir)
 
 
-def build_page(template_name, source_path, output_path, meta, full_rebuild=False):
-    source_mod_time = os.path.getmtime(source_path) if os.path.exists(source_path) else 0
-    output_mod_time = os.path.getmtime(output_path) if os.path.exists(output_path) else 0
-
-    # all need rebuild, if template modified, file doesn't exist or full rebuild
-    needs_rebuild = (
-        full_rebuild or 
-        not os.path.exists(output_path) or 
-        os.path.getmtime(output_path) < meta['last_template_mod_time']
+def is_outdated(cache_key, output_path, cache, full_rebuild=False):
+    # content hashes don't jitter like mtimes do after checkouts or backups
+    return (
+        full_rebuild or
+        not os.path.exists(output_path) or
+        cache.get(output_path) != cache_key
     )
-    
-    if SITE['post']['dir'] in  source_path:
-        needs_rebuild = needs_rebuild or source_mod_time > output_mod_time 
-    else:
-        # landing, feed, sitemap needs rebuild if new post
-        needs_rebuild = needs_rebuild or os.path.getmtime(output_path) < meta['last_post_mod_time']
-
-    if needs_rebuild:
-        template = env.get_template(template_name)
-        content = template.render(meta=meta)
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, 'w') as file:
-            file.write(content)
+
+
+def write_output(output_path, content):
+    # one encode + one write syscall, renamed into place when complete
+    data = content.encode('utf-8')
+    tmp_path = output_path + '.tmp'
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, output_path)
+    logging.info(f"Built: {output_path}")
+
+
+def build_page(template_name, cache_key, output_path, meta, cache, full_rebuild=False):
+    if is_outdated(cache_key, output_path, cache, full_rebuild):
+        template = get_template(template_name)
+        # stream chunk by chunk instead of materializing the whole page,
+        # binary mode dump skips the TextIOWrapper encode layer
+        stream = template.stream(meta=meta)
+        stream.enable_buffering(size=8192)
+        tmp_path = output_path + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            stream.dump(file, encoding='utf-8')
+        os.replace(tmp_path, output_path)
         logging.info(f"Built: {output_path}")
+        cache[output_path] = cache_key
 
-  
-def build_pages(meta,full_rebuild=False):
-    for key, page in SITE['pages'].items():
-        source_path = os.path.join(SITE['templates']['dir'], page['template'])
-        output_path = os.path.join(SITE['output']['dir'], page.get('url', ''), page.get('output_file', 'index.html'))
-        page_meta = {**meta, 'page': page}
-        build_page(page['template'], source_path, output_path, page_meta, full_rebuild)
 
-    
-def build_posts(meta, full_rebuild=False):
-    for post_meta in meta['posts']:
-        source_path = os.path.join(SITE['post']['dir'], post_meta['filename'])
-        output_path = os.path.join(SITE['output']['dir'], post_meta['url'], 'index.html')
-        html_content = markdown.markdown((post_meta['content_md']))
-        page_meta = {**meta, 'post': post_meta,'content': html_content}
-        build_page(SITE['post']['template'], source_path, output_path, page_meta, full_rebuild)
+# shared build meta, set once per render worker instead of pickled per task
+WORKER_META = None
+
+
+def init_render_worker(meta):
+    global WORKER_META
+    WORKER_META = meta
+
+
+def render_post(post_index):
+    post_meta = WORKER_META['posts'][post_index]
+    html_content = MD.reset().convert(post_meta['content_md'])
+    # constant-time wrap, {**meta, ...} would shallow-copy meta per post
+    page_meta = ChainMap({'post': post_meta, 'content': html_content}, WORKER_META)
+    template = get_template(SITE['post']['template'])
+    return template.render(meta=page_meta)
 
 
-def build_feed(meta, full_rebuild=False):
-    source_path = os.path.join(SITE['templates']['dir'], SITE['feed']['template'])
+def build_pages(meta, cache, full_rebuild=False):
+    output_dir = SITE['output']['dir']
+    site_key = meta['site_key']
+    for key, page in SITE['pages'].items():
+        output_path = os.path.join(output_dir, page.get('url', ''), page.get('output_file', 'index.html'))
+        page_meta = ChainMap({'page': page}, meta)
+        build_page(page['template'], site_key, output_path, page_meta, cache, full_rebuild)
+
+    
+def build_posts(meta, cache, full_rebuild=False):
+    # pre-filter so workers never render unchanged posts
+    needs_build = [
+        i for i, post_meta in enumerate(meta['posts'])
+        if is_outdated(post_meta['cache_key'], post_meta['output_path'], cache, full_rebuild)
+    ]
+
+    if not needs_build:
+        return
+
+    # markdown + jinja are cpu-bound, spread posts across cores and write here,
+    # the initializer ships meta to each worker once instead of once per task
+    with ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        initializer=init_render_worker,
+        initargs=(meta,)
+    ) as pool:
+        futures = {pool.submit(render_post, i): meta['posts'][i] for i in needs_build}
+        for future in as_completed(futures):
+            post_meta = futures[future]
+            write_output(post_meta['output_path'], future.result())
+            cache[post_meta['output_path']] = post_meta['cache_key']
+
+
+def build_feed(meta, cache, full_rebuild=False):
     output_path = os.path.join(SITE['output']['dir'], SITE['feed']['output_file'])
-    build_page(SITE['feed']['template'], source_path, output_path, meta, full_rebuild)
+    build_page(SITE['feed']['template'], meta['site_key'], output_path, meta, cache, full_rebuild)
 
 
-def build_sitemap(meta, full_rebuild=False):
-    source_path = os.path.join(SITE['templates']['dir'], SITE['sitemap']['template'])
+def build_sitemap(meta, cache, full_rebuild=False):
     output_path = os.path.join(SITE['output']['dir'], SITE['sitemap']['output_file'])
-    build_page(SITE['sitemap']['template'], source_path, output_path, meta, full_rebuild)
+    build_page(SITE['sitemap']['template'], meta['site_key'], output_path, meta, cache, full_rebuild)
 
 
-def build_robotstxt(meta, full_rebuild=False):
-    source_path = os.path.join(SITE['templates']['dir'], SITE['robots']['template'])
+def build_robotstxt(meta, cache, full_rebuild=False):
     output_path = os.path.join(SITE['output']['dir'], SITE['robots']['output_file'])
-    build_page(SITE['robots']['template'], source_path, output_path, meta, full_rebuild)
+    build_page(SITE['robots']['template'], meta['site_key'], output_path, meta, cache, full_rebuild)
 
 
 def generate_site(full_rebuild=False):
     start_time = time.time()
 
+    # cheapest possible no-op: if nothing in posts/templates/assets moved
+    # since the last successful build, skip the reads and parses entirely
+    fingerprint = str(latest_mtime_ns(SITE['post']['dir'], SITE['templates']['dir'], SITE['assets']['dir']))
+    if not full_rebuild and fingerprint == read_fingerprint():
+        logging.info("No changes, skipping build")
+        return
+
     clean_or_make_output_dir(full_rebuild)
 
-    meta = get_meta()
+    # warm the template cache before the workers fork
+    for template_name in env.list_templates():
+        get_template(template_name)
 
-    build_pages(meta, full_rebuild)
-    build_posts(meta, full_rebuild)
-    build_feed(meta, full_rebuild)
-    build_sitemap(meta, full_rebuild)
-    build_robotstxt(meta, full_rebuild)
+    meta = get_meta()
+    make_output_dirs(meta)
+    cache = {} if full_rebuild else load_cache()
+
+    build_pages(meta, cache, full_rebuild)
+    build_posts(meta, cache, full_rebuild)
+    build_feed(meta, cache, full_rebuild)
+    build_sitemap(meta, cache, full_rebuild)
+    build_robotstxt(meta, cache, full_rebuild)
     copy_assets()
+    save_cache(cache)
+    save_fingerprint(fingerprint)
 
     elapsed_time = time.time() - start_time
     logging.info(f"Done in {elapsed_time:.2f} seconds")